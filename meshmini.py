@@ -6,10 +6,10 @@
 # - whois / dm: fuzzy short-name matching (exact → prefix → contains) with suggestions
 # - General: same features you already have (menu/help/posts/replies/info/status/whoami/nodes/dm/admin/blacklist/peers/sync/health/watchdog)
 
-import os, sys, time, sqlite3, threading, random, string
+import os, re, sys, time, sqlite3, threading, functools, queue, zlib, base64, signal, hashlib, contextlib
 from datetime import datetime, timezone
 from typing import List, Optional
-from collections import deque
+from collections import deque, OrderedDict
 
 try:
     import meshtastic
@@ -24,6 +24,11 @@ try:
 except Exception:
     pub = None
 
+try:
+    from meshtastic import portnums_pb2  # type: ignore
+except Exception:
+    portnums_pb2 = None
+
 # ---- env / knobs -------------------------------------------------------------
 DB_PATH       = os.environ.get("MMB_DB", "/opt/meshmini/board.db")
 DEVICE_PATH   = os.environ.get("MMB_DEVICE", "auto")
@@ -35,23 +40,67 @@ MAX_TEXT      = int(os.environ.get("MMB_MAX_TEXT", "140"))
 HEALTH_PUBLIC = int(os.environ.get("MMB_HEALTH_PUBLIC", "0"))
 DEBUG_LOG     = int(os.environ.get("MMB_DEBUG", "0"))
 
+# SQLite durability level: NORMAL is the right WAL default; set FULL on
+# flaky power if you'd rather pay the extra fsync per commit
+SQLITE_SYNC   = os.environ.get("MMB_SQLITE_SYNC", "NORMAL").upper()
+if SQLITE_SYNC not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    SQLITE_SYNC = "NORMAL"
+
 # Unknown reply filter (only reply to unknown *text*, ignore acks/telemetry)
 UNKNOWN_REPLY = int(os.environ.get("MMB_UNKNOWN_REPLY", "1"))
 
+# Cap for the nodes listing (big meshes would otherwise flood the link)
+NODES_MAX     = int(os.environ.get("MMB_NODES_MAX", "30"))
+
 # Peer sync
 SYNC_ON      = int(os.environ.get("MMB_SYNC", "1"))
 PEERS_ENV    = [p.strip() for p in os.environ.get("MMB_PEERS", "").split(",") if p.strip()]
-SYNC_INV_N   = max(5, int(os.environ.get("MMB_SYNC_INV", "15")))
 SYNC_PERIOD  = int(os.environ.get("MMB_SYNC_PERIOD", "300"))
 CHUNK_BYTES  = int(os.environ.get("MMB_SYNC_CHUNK", "160"))
 SYNC_TAG     = "#SYNC"
 
+# one compiled pattern per sync frame type; single-pass extraction on the
+# hot PART path, and chunk capture that can't be confused by an "i/total"
+# substring inside the body
+_RE_SYNC_INV  = re.compile(re.escape(SYNC_TAG) + r" INV (?:ids=([0-9,]*))?\s*(?:hi=(\d+) bf=([0-9a-fA-F]+))?\s*$")
+_INV_WINDOW   = 128  # posts covered by the INV bloom filter
+_EMPTY        = {}   # shared empty dict; avoids an allocation per packet
+# menu/help triggers as frozensets: one hash probe instead of tuple scans
+_MENU_HELP_MARKS = frozenset(("?", "??"))
+_MENU_HELP_WORDS = frozenset(("help", "menu", "m", "h"))
+_MENU_TOKENS     = frozenset(("?", "menu", "m"))
+# responses sent from more than one site; interned once at load
+MSG_ADMIN_ONLY = "admin only"
+MSG_UNKNOWN    = "I didn't recognise that. Send '?' for menu."
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)  # INSERT ... RETURNING
+
+# hot-path SQL as shared literals: identical string objects hit sqlite3's
+# statement cache by identity instead of re-hashing a fresh literal per call
+_SQL_POST_EXISTS   = "SELECT 1 FROM posts WHERE id=?"
+_SQL_POST_FETCH    = "SELECT id,ts,author,body,reply_to FROM posts WHERE id=?"
+_SQL_UID_APPLIED   = "SELECT 1 FROM applied_uids WHERE uid=?"
+_SQL_DM_PENDING    = "SELECT id,body FROM dm_out WHERE to_id=? AND delivered_ts IS NULL ORDER BY id LIMIT 3"
+_SQL_ADMIN_LIST    = "SELECT id FROM admins ORDER BY id"
+_SQL_BL_LIST       = "SELECT id FROM blacklist ORDER BY id"
+_RE_SYNC_GET  = re.compile(re.escape(SYNC_TAG) + r" GET id=(\d+)\s*$")
+_RE_SYNC_POST = re.compile(re.escape(SYNC_TAG) + r" POST uid=(\S+) id=(\d+) .*\bn=(\d+)(?: c=(\d))?\s*$", re.S)
+_RE_SYNC_PART = re.compile(re.escape(SYNC_TAG) + r" PART uid=(\S+) (\d+)/(\d+) (.*)$", re.S)
+_RE_SYNC_END  = re.compile(re.escape(SYNC_TAG) + r" END uid=(\S+)\s*$")
+
 # Watchdog
 RX_STALE_SEC = int(os.environ.get("MMB_RX_STALE_SEC", "240"))
 WATCH_TICK   = int(os.environ.get("MMB_WATCH_TICK", "10"))
 
+# Retention for sync bookkeeping (GC sweep)
+GC_TICK        = int(os.environ.get("MMB_GC_TICK", "3600"))
+UID_KEEP_SEC   = int(os.environ.get("MMB_UID_KEEP_SEC", str(7*86400)))
+RXPART_KEEP_SEC = 3600
+
 def now() -> int: return int(time.time())
-def gen_uid(n=10): return ''.join(random.choice(string.ascii_lowercase + string.digits) for _ in range(n))
+def gen_uid(n=10):
+    # one urandom read beats ten random.choice calls, and keeps sync uid
+    # generation off the shared MT state
+    return base64.b32encode(os.urandom(8)).decode("ascii").lower().rstrip("=")[:n]
 def fmt_uptime(seconds:int) -> str:
     h = seconds // 3600; m = (seconds % 3600) // 60
     return f"{h}h{m:02d}m"
@@ -59,15 +108,88 @@ def dlog(msg: str):
     if DEBUG_LOG:
         print(msg, flush=True)
 
+def _encode_sync_body(body: str):
+    """Compress a post body for the radio; returns (wire_text, compressed_flag).
+
+    Airtime is the scarce resource, not CPU: typical post text shrinks
+    40-60%% under zlib even after the base64 framing. Falls back to the
+    plain body whenever compression doesn't pay."""
+    try:
+        blob = base64.b64encode(zlib.compress(body.encode("utf-8"), 9)).decode("ascii")
+    except Exception:
+        return body, 0
+    return (blob, 1) if len(blob) < len(body) else (body, 0)
+
+def _chunk_utf8(text: str, size: int = None) -> List[str]:
+    """Split text into chunks of at most `size` UTF-8 *bytes*.
+
+    Character-based slicing over-counts with multi-byte text — 160 chars
+    of CJK or emoji is far more than 160 bytes and can blow the radio
+    MTU. Encode once, slice a memoryview, and back off any cut that
+    would land inside a multi-byte sequence."""
+    if size is None:
+        size = CHUNK_BYTES
+    if size < 4:
+        # below one UTF-8 code point the continuation-byte backoff can
+        # retreat to the chunk start and stop advancing — clamp instead
+        size = 4
+    b = text.encode("utf-8")
+    n = len(b)
+    if n <= size:
+        return [text]
+    mv = memoryview(b)
+    parts, i = [], 0
+    while i < n:
+        j = min(i + size, n)
+        while j < n and j > i and (b[j] & 0xC0) == 0x80:
+            j -= 1
+        parts.append(bytes(mv[i:j]).decode("utf-8"))
+        i = j
+    return parts
+
+def _decode_sync_body(data: str, compressed: bool) -> str:
+    if not compressed:
+        return data
+    try:
+        return zlib.decompress(base64.b64decode(data)).decode("utf-8", "replace")
+    except Exception:
+        return data
+
 # ---- helpers for name cleaning & matching -----------------------------------
 def _clean_name(s: Optional[str]) -> str:
     """Collapse all whitespace/newlines to single spaces; strip ends."""
     return " ".join((s or "").split())
 
+# strips runs of non-alnum in one C-level pass; [\W_] keeps the same
+# unicode-alnum semantics the old per-char isalnum loop had
+_RE_NONALNUM = re.compile(r"[\W_]+", re.UNICODE)
+
+@functools.lru_cache(maxsize=1024)
 def _norm_short(s: Optional[str]) -> str:
-    """Normalize a short name for matching: alnum-only + lowercase."""
-    s = s or ""
-    return "".join(ch for ch in s if ch.isalnum()).lower()
+    """Normalize a short name for matching: alnum-only + lowercase.
+
+    Cached: inputs are node short names / user queries, a small bounded set,
+    so repeat whois/dm/nodes calls skip the munging entirely."""
+    return _RE_NONALNUM.sub("", s or "").lower()
+
+@functools.lru_cache(maxsize=1024)
+def _nodeid_from_int(n: int) -> str:
+    return f"!{n & 0xffffffff:08x}"
+
+class _SeenIds:
+    """Fixed-size packet-id dedup window: deque for FIFO eviction, set for
+    O(1) membership — 'in' against a bare deque scans all 256 slots."""
+    __slots__ = ("_dq", "_set")
+    def __init__(self, maxlen=256):
+        self._dq = deque(maxlen=maxlen)
+        self._set = set()
+    def __contains__(self, pid):
+        return pid in self._set
+    def add(self, pid):
+        if len(self._dq) == self._dq.maxlen:
+            self._set.discard(self._dq[0])
+        self._dq.append(pid)
+        self._set.add(pid)
 
 # ---- main -------------------------------------------------------------------
 class MiniBBS:
@@ -77,38 +199,255 @@ class MiniBBS:
         self.node_id = None
         self.dev_path = None
         self.connected_at = 0
-        self.last_rx_at = 0.0
-        self.last_seen = {}
+        self.last_rx_at = 0.0   # monotonic; interval math must not see NTP jumps
+        self.last_seen = OrderedDict()   # LRU-bounded; see _on_receive rate limit
         self.stop_evt = threading.Event()
         self.sync_enabled = bool(SYNC_ON)
-        self.sync_thread = None
-        self.watch_thread = None
+        self.tick_thread = None
+        self._last_inv_latest = -1   # forces one INV after startup
+        self._health_cache = (0.0, None)
+        self._health_lock = threading.Lock()
         self.last_inv_at = 0
-        self.seen_pkt_ids = deque(maxlen=256)
-
-        self.db = sqlite3.connect(DB_PATH, check_same_thread=False)
+        self.seen_pkt_ids = _SeenIds(maxlen=256)
+        # in-flight sync reassembly buffers: uid -> {"total","parts","from","ts"}
+        self._rx_buf = {}
+        self._rx_buf_lock = threading.Lock()   # receive thread vs gc eviction
+        # serializes writers on the shared main connection (receive thread,
+        # tick jobs); reentrant so the sync END apply can nest _post_new
+        self._db_lock = threading.RLock()
+        self._dm_notify = set()          # nodes heard recently; checked for queued DMs
+        # lazy shortName → nodes index for whois/dm exact matches
+        self._short_idx = None
+        self._short_idx_ts = 0
+        self._menu_cache = None
+        # command token -> bound wrapper; one hash lookup per message
+        self._dispatch = {
+            "r": self._h_read, "p": self._h_post, "post": self._h_post,
+            "reply": self._h_reply, "info": self._h_info,
+            "status": self._h_status, "whoami": self._h_whoami,
+            "whois": self._h_whois, "nodes": self._h_nodes,
+            "node": self._h_nodes, "dm": self._h_dm, "health": self._h_health,
+            "admins": self._h_admins, "bl": self._h_bl, "peer": self._h_peer,
+            "sync": self._h_sync_cmd,
+        }
+        # health templates: built once, filled per call
+        self._health_tpl = ("link=ok dev={dev} up={up} posts={posts} latest={latest}"
+                            " peers={peers} admins={admins} bl={bl} qdm={qdm}"
+                            " nodes={nodes} sync={sync} inv={inv}")
+        self._health_pages_fmt = ("link=ok dev={dev} up={up}",
+                                  "posts={posts} latest={latest} peers={peers}",
+                                  "admins={admins} bl={bl} qdm={qdm} nodes={nodes}",
+                                  "sync={sync} last_inv={inv}")
+        self._nodes_snapshot = None
+        self._nodes_snapshot_ts = 0
+        # fire-and-forget DB writes drain on a dedicated thread so the receive
+        # callback never waits on an fsync
+        self._write_q = queue.Queue()
+        self.writer_thread = None
+        self._tx_q = queue.Queue()
+        self.tx_thread = None
+
+        self.db = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=512)
         self.db.row_factory = sqlite3.Row
         self._init_db()
 
-        for a in [a.strip() for a in ADMINS_CSV.split(",") if a.strip()]:
-            self._admin_add(a)
-        for p in PEERS_ENV:
-            self._peer_add(p)
+        # in-memory mirrors of the small ACL tables; the DB stays authoritative
+        # across restarts but the receive path only ever touches these sets
+        self._admins    = {r["id"] for r in self.db.execute("SELECT id FROM admins")}
+        self._peers     = {r["id"] for r in self.db.execute("SELECT id FROM peers")}
+        self._blacklist = {r["id"] for r in self.db.execute("SELECT id FROM blacklist")}
+        # bloom frontend for applied_uids: most ENDs carry a new uid, so the
+        # dedup check is usually a negative lookup — answer those from a 4 KB
+        # in-memory bitset instead of a SQLite probe. False positives just
+        # fall through to the real query.
+        self._applied_bloom = bytearray(4096)
+        for r in self.db.execute("SELECT uid FROM applied_uids"):
+            self._bloom_add(r["uid"])
+
+        # nodes with undelivered DMs — lets the receive path skip the outbox
+        # probe entirely for the vast majority of senders
+        self._has_pending_dm = {r["to_id"] for r in
+                                self.db.execute("SELECT DISTINCT to_id FROM dm_out WHERE delivered_ts IS NULL")}
+
+        # seed env-configured admins/peers in a single transaction — the old
+        # per-row _admin_add/_peer_add loop cost one fsync each at boot
+        env_admins = [a.strip() for a in ADMINS_CSV.split(",") if a.strip()]
+        try:
+            with self.db:
+                self.db.executemany("INSERT OR IGNORE INTO admins(id) VALUES(?)",
+                                    [(a,) for a in env_admins])
+                self.db.executemany("INSERT OR IGNORE INTO peers(id,last_seen) VALUES(?,0)",
+                                    [(p,) for p in PEERS_ENV])
+        except Exception as e:
+            dlog(f"[meshmini] env seed failed: {e}")
+        self._admins.update(env_admins)
+        self._peers.update(PEERS_ENV)
+
+        # health counters, maintained at the write sites — COUNT(*) scans
+        # grow with table size and health shouldn't. Snapshot after the env
+        # seeding above so freshly seeded admins/peers are counted.
+        self._counts = dict(zip(
+            ("posts", "latest", "admins", "peers", "bl", "qdm"),
+            self.db.execute(
+                "SELECT (SELECT COUNT(*) FROM posts),"
+                " (SELECT IFNULL(MAX(id),0) FROM posts),"
+                " (SELECT COUNT(*) FROM admins),"
+                " (SELECT COUNT(*) FROM peers),"
+                " (SELECT COUNT(*) FROM blacklist),"
+                " (SELECT COUNT(*) FROM dm_out WHERE delivered_ts IS NULL)"
+            ).fetchone()))
+
+    # -- applied-uid bloom helpers
+    def _bloom_bits(self, uid):
+        d = hashlib.blake2s(uid.encode("utf-8"), digest_size=12).digest()
+        nbits = len(self._applied_bloom) * 8
+        return (int.from_bytes(d[0:4], "little") % nbits,
+                int.from_bytes(d[4:8], "little") % nbits,
+                int.from_bytes(d[8:12], "little") % nbits)
+    def _bloom_add(self, uid):
+        bl = self._applied_bloom
+        for b in self._bloom_bits(uid):
+            bl[b >> 3] |= 1 << (b & 7)
+    def _bloom_maybe(self, uid) -> bool:
+        bl = self._applied_bloom
+        return all(bl[b >> 3] & (1 << (b & 7)) for b in self._bloom_bits(uid))
 
     # -- DB schema
     def _init_db(self):
         c = self.db.cursor()
+        # WAL + relaxed sync: one fsync per commit instead of two, and writers
+        # no longer block readers — big deal on Pi-class SD storage.
+        try:
+            mode = c.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            if str(mode).lower() != "wal":
+                dlog(f"[meshmini] WAL not available (journal_mode={mode})")
+            c.execute(f"PRAGMA synchronous={SQLITE_SYNC}")
+            c.execute("PRAGMA busy_timeout=5000")
+            c.execute("PRAGMA temp_store=MEMORY")
+            c.execute("PRAGMA cache_size=-8000")
+            c.execute("PRAGMA mmap_size=67108864")
+        except Exception as e:
+            dlog(f"[meshmini] pragma setup failed: {e}")
         c.execute("CREATE TABLE IF NOT EXISTS posts (id INTEGER PRIMARY KEY AUTOINCREMENT, ts INTEGER, author TEXT, body TEXT, reply_to INTEGER)")
         c.execute("CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v TEXT)")
-        c.execute("CREATE TABLE IF NOT EXISTS admins (id TEXT PRIMARY KEY)")
-        c.execute("CREATE TABLE IF NOT EXISTS blacklist (id TEXT PRIMARY KEY)")
-        c.execute("CREATE TABLE IF NOT EXISTS peers (id TEXT PRIMARY KEY, last_seen INTEGER)")
-        c.execute("CREATE TABLE IF NOT EXISTS seen_uids (uid TEXT PRIMARY KEY, ts INTEGER)")
-        c.execute("CREATE TABLE IF NOT EXISTS applied_uids (uid TEXT PRIMARY KEY, ts INTEGER)")
+        # text-keyed lookup tables live entirely in their PK b-tree with
+        # WITHOUT ROWID — one b-tree hop less per probe and smaller rows.
+        # Legacy rowid versions (pre-existing DBs) get rebuilt in place once.
+        for name, ddl in (
+            ("admins",       "CREATE TABLE admins (id TEXT PRIMARY KEY) WITHOUT ROWID"),
+            ("blacklist",    "CREATE TABLE blacklist (id TEXT PRIMARY KEY) WITHOUT ROWID"),
+            ("peers",        "CREATE TABLE peers (id TEXT PRIMARY KEY, last_seen INTEGER, last_known_id INTEGER DEFAULT 0) WITHOUT ROWID"),
+            ("seen_uids",    "CREATE TABLE seen_uids (uid TEXT PRIMARY KEY, ts INTEGER) WITHOUT ROWID"),
+            ("applied_uids", "CREATE TABLE applied_uids (uid TEXT PRIMARY KEY, ts INTEGER) WITHOUT ROWID"),
+        ):
+            row = c.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone()
+            if row is None:
+                c.execute(ddl)
+            elif "without rowid" not in (row[0] or "").lower():
+                c.execute(f"ALTER TABLE {name} RENAME TO {name}_legacy")
+                c.execute(ddl)
+                if name == "peers":
+                    c.execute("INSERT OR IGNORE INTO peers(id,last_seen) SELECT id,last_seen FROM peers_legacy")
+                else:
+                    c.execute(f"INSERT OR IGNORE INTO {name} SELECT * FROM {name}_legacy")
+                c.execute(f"DROP TABLE {name}_legacy")
         c.execute("CREATE TABLE IF NOT EXISTS rxparts (uid TEXT PRIMARY KEY, total INTEGER, got INTEGER, data TEXT, from_id TEXT, created_ts INTEGER)")
         c.execute("CREATE TABLE IF NOT EXISTS dm_out (id INTEGER PRIMARY KEY, to_id TEXT, body TEXT, created_ts INTEGER, delivered_ts INTEGER)")
+        # covering index so the per-packet pending-DM probe is an index range scan
+        c.execute("CREATE INDEX IF NOT EXISTS idx_dm_out_to ON dm_out(to_id, delivered_ts, id)")
+        # tiny partial index: counting/scanning undelivered DMs touches only
+        # the undelivered rows, not the whole outbox history
+        c.execute("CREATE INDEX IF NOT EXISTS idx_dm_out_undelivered ON dm_out(delivered_ts) WHERE delivered_ts IS NULL")
+        # thread views look up replies by parent; partial index stays tiny
+        c.execute("CREATE INDEX IF NOT EXISTS idx_posts_reply ON posts(reply_to) WHERE reply_to IS NOT NULL")
+        # lets GC sweeps of stale rxparts run as a range scan
+        c.execute("CREATE INDEX IF NOT EXISTS idx_rxparts_created ON rxparts(created_ts)")
+        # descending scan for the 'r' list view (ORDER BY id DESC LIMIT 10)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_posts_id_desc ON posts(id DESC)")
+        # per-peer sync high-watermark (added later; guard for old DBs)
+        try:
+            c.execute("ALTER TABLE peers ADD COLUMN last_known_id INTEGER DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass
         # optional notice metadata (store in kv without schema change)
         self.db.commit()
+        try:
+            c.execute("ANALYZE")
+        except Exception:
+            pass
+
+    # -- async DB writer
+    def _db_write(self, sql, params=()):
+        """Queue a write for the writer thread (no result needed by caller)."""
+        self._write_q.put((sql, params))
+
+    def _writer_loop(self):
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA busy_timeout=5000")
+            # same durability knob as the main connection — without it this
+            # connection runs at synchronous=FULL and pays the very fsyncs
+            # the writer thread exists to absorb
+            conn.execute(f"PRAGMA synchronous={SQLITE_SYNC}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+        except Exception:
+            pass
+        while not self.stop_evt.is_set():
+            try:
+                job = self._write_q.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if job is None:
+                # shutdown sentinel from start(); loop condition exits next
+                continue
+            jobs = [job]
+            while len(jobs) < 32:
+                try:
+                    j = self._write_q.get_nowait()
+                except queue.Empty:
+                    break
+                if j is not None:
+                    jobs.append(j)
+            self._writer_run(conn, jobs)
+        # shutdown: flush whatever is still queued so a SIGTERM doesn't
+        # drop DM inserts or delivered-marks that were accepted pre-stop
+        jobs = []
+        while True:
+            try:
+                j = self._write_q.get_nowait()
+            except queue.Empty:
+                break
+            if j is not None:
+                jobs.append(j)
+        if jobs:
+            self._writer_run(conn, jobs)
+        conn.close()
+
+    @staticmethod
+    def _writer_run(conn, jobs):
+        # PRAGMAs (the GC's wal_checkpoint) must run outside the batch
+        # transaction: sqlite refuses a checkpoint inside an open write
+        # txn and the error would roll back every job batched with it
+        stmts, pragmas = [], []
+        for j in jobs:
+            (pragmas if j[0].lstrip()[:6].upper() == "PRAGMA" else stmts).append(j)
+        try:
+            with conn:
+                for sql, params in stmts:
+                    conn.execute(sql, params)
+        except Exception:
+            # retry per-job so one bad statement can't discard the rest
+            for sql, params in stmts:
+                try:
+                    with conn:
+                        conn.execute(sql, params)
+                except Exception as e:
+                    print(f"[meshmini] db writer error: {e}")
+        for sql, params in pragmas:
+            try:
+                conn.execute(sql, params)
+            except Exception as e:
+                print(f"[meshmini] db writer error: {e}")
 
     # -- serial connect
     def _candidate_ports(self) -> List[str]:
@@ -133,7 +472,7 @@ class MiniBBS:
                 self.node_id = self.iface.myInfo.my_node_num if hasattr(self.iface, "myInfo") else None
                 self.dev_path = cand
                 self.connected_at = now()
-                self.last_rx_at = time.time()
+                self.last_rx_at = time.monotonic()
                 self.iface.onReceive = self._on_receive
                 print(f"[meshmini] Connected on {cand}.")
                 self._subscribe_pub()
@@ -148,7 +487,7 @@ class MiniBBS:
             print("[meshmini] Reconnecting serial…")
             if self.iface:
                 try: self.iface.close()
-                except: pass
+                except Exception: pass
             self.iface = None
             time.sleep(1.0)
             self._connect()
@@ -174,7 +513,7 @@ class MiniBBS:
         pid = packet.get("id") or (packet.get("from"), packet.get("rxTime"))
         if pid in self.seen_pkt_ids:
             return
-        self.seen_pkt_ids.append(pid)
+        self.seen_pkt_ids.add(pid)
         self._on_receive(packet, interface)
 
     # -- node helpers
@@ -187,27 +526,32 @@ class MiniBBS:
         return None
 
     def _key_to_nodeid(self, key, entry) -> str:
+        # int keys dominate (the node DB is keyed by node number); exact
+        # type test first and a cached formatter keep the nodes inner loop
+        # off the slow isinstance/exception paths
+        if type(key) is int:
+            return _nodeid_from_int(key)
         if isinstance(key, int):
-            return f"!{key & 0xffffffff:08x}"
+            return _nodeid_from_int(key)
         if isinstance(key, str):
             s = key.strip()
             if s.startswith("!"):
                 return s.lower()
             try:
-                return f"!{int(s, 16) & 0xffffffff:08x}"
+                return _nodeid_from_int(int(s, 16))
             except Exception:
                 pass
         if isinstance(entry, dict):
             for fld in ("num","nodeNum","node_id","nodeId","id"):
                 v = entry.get(fld)
                 if isinstance(v, int):
-                    return f"!{v & 0xffffffff:08x}"
+                    return _nodeid_from_int(v)
                 if isinstance(v, str):
                     sv = v.strip()
                     if sv.startswith("!"):
                         return sv.lower()
                     try:
-                        return f"!{int(sv, 16) & 0xffffffff:08x}"
+                        return _nodeid_from_int(int(sv, 16))
                     except Exception:
                         pass
         return "!?unknown"
@@ -235,31 +579,65 @@ class MiniBBS:
         except Exception:
             return
 
+    def _count_nodes(self) -> int:
+        # len() on the node dict is O(1); fall back to iteration (and the
+        # snapshot's dedup) only when the interface doesn't expose one
+        nd = getattr(self.iface, "nodes", None)
+        if isinstance(nd, dict):
+            return len(nd)
+        try:
+            return len(self._collect_nodes())
+        except Exception:
+            return 0
+
     def _collect_nodes(self):
-        """Return clean, deduped list of nodes: [{'nid','sn','ln'}]."""
+        """Return clean, deduped, sorted list of nodes: [{'nid','sn','ln'}].
+
+        The cleaned/sorted snapshot is cached for 30 s — the node DB only
+        drifts as NodeInfo trickles in, and rebuilding it on the receive
+        thread for every nodes/whois/dm is O(N log N) on big meshes."""
+        t = time.monotonic()
+        if self._nodes_snapshot is not None and t - self._nodes_snapshot_ts < 30:
+            return self._nodes_snapshot
         seen = set()
         out = []
+        _key = self._key_to_nodeid
         for key, entry in self._iter_nodes():
             u = entry.get("user", {}) if isinstance(entry, dict) else {}
-            sn = _clean_name(u.get("shortName") or "?") or "?"
-            ln = _clean_name(u.get("longName") or "")
-            nid = self._key_to_nodeid(key, entry)
+            # intern names so repeat listings share one string object per node
+            sn = sys.intern(_clean_name(u.get("shortName") or "?") or "?")
+            ln = sys.intern(_clean_name(u.get("longName") or ""))
+            nid = _key(key, entry)
             if not nid or nid in seen:
                 continue
             seen.add(nid)
             out.append({"nid": nid, "sn": sn, "ln": ln})
         # stable sort by normalized short name, then nid
         out.sort(key=lambda n: (_norm_short(n["sn"]), n["nid"]))
+        self._nodes_snapshot = out
+        self._nodes_snapshot_ts = t
         return out
 
+    def _refresh_short_idx(self):
+        """Rebuild the shortName→nodes index at most every 30s."""
+        t = now()
+        if t - self._short_idx_ts < 30 and self._short_idx is not None:
+            return
+        idx = {}
+        for n in self._collect_nodes():
+            idx.setdefault(_norm_short(n["sn"]), []).append(n)
+        self._short_idx = idx
+        self._short_idx_ts = t
+
     def _match_short(self, query: str):
         """Fuzzy match short name. Returns (hit or None, suggestions list)."""
         q = _norm_short(query)
-        nodes = self._collect_nodes()
-        # exact
-        exact = [n for n in nodes if _norm_short(n["sn"]) == q]
+        # exact matches come straight off the index: O(1) per whois/dm
+        self._refresh_short_idx()
+        exact = self._short_idx.get(q)
         if exact:
             return exact[0], None
+        nodes = self._collect_nodes()
         # prefix
         pref = [n for n in nodes if _norm_short(n["sn"]).startswith(q)]
         if len(pref) == 1:
@@ -274,39 +652,81 @@ class MiniBBS:
             return None, cont[:6]
         return None, []
 
-    # -- send helpers
+    # -- send helpers: enqueue only; the tx pacer thread owns the radio.
+    # Callers (command handlers, sync replication) no longer block 0.8 s
+    # per frame — a 3-chunk post to 3 peers used to stall its thread 12 s.
     def _send_text(self, dest: Optional[str], text: str):
         if not self.iface: return
-        text = text.strip()
-        try:
-            if dest and dest.startswith("!"):
-                dlog(f"[send] -> {dest} ch=0: {text}")
-                self.iface.sendText(text, destinationId=dest)
-            else:
-                dlog(f"[send] -> ^all ch=0: {text}")
-                self.iface.sendText(text)
+        self._tx_q.put((dest, text.strip()))
+
+    def _send_sync(self, dest: Optional[str], text: str):
+        """Queue a sync frame; the pacer sends it on PRIVATE_APP when the
+        protobufs are available so #SYNC stays off the text channel, and
+        falls back to plain text otherwise."""
+        if not self.iface: return
+        self._tx_q.put((dest, text.strip(), True))
+
+    def _tx_loop(self):
+        # single consumer: the airtime gap lives here, between actual radio
+        # transmissions, instead of inside every caller
+        while not self.stop_evt.is_set():
+            try:
+                item = self._tx_q.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if not item: continue
+            dest, text = item[0], item[1]
+            sync = len(item) > 2 and item[2]
+            try:
+                if sync and dest and portnums_pb2 is not None:
+                    if DEBUG_LOG: dlog(f"[send] -> {dest} port=PRIVATE_APP: {text}")
+                    self.iface.sendData(text.encode("utf-8"), destinationId=dest,
+                                        portNum=portnums_pb2.PortNum.PRIVATE_APP,
+                                        wantAck=False)
+                elif dest and dest.startswith("!"):
+                    if DEBUG_LOG: dlog(f"[send] -> {dest} ch=0: {text}")
+                    self.iface.sendText(text, destinationId=dest)
+                else:
+                    if DEBUG_LOG: dlog(f"[send] -> ^all ch=0: {text}")
+                    self.iface.sendText(text)
+            except Exception as e:
+                print(f"[meshmini] send error: {e}")
             time.sleep(0.8)
-        except Exception as e:
-            print(f"[meshmini] send error: {e}")
 
-    def _send_paged(self, dest: Optional[str], lines: List[str], title=None):
+    def _send_paged(self, dest: Optional[str], lines, title=None):
+        # accepts any iterable of lines; consumed exactly once
         head = f"{title}\n" if title else ""
-        pages, cur = [], head
+        # build each page as a list of parts joined once — repeated str +=
+        # goes quadratic on long listings like nodes/help
+        pages, cur, cur_len = [], [head], len(head)
+        clean = _clean_name          # one global load for the whole listing
         for ln in lines:
-            ln = _clean_name(ln)
-            if len(cur) + len(ln) + 1 > MAX_TEXT:
-                pages.append(cur.rstrip())
-                cur = head + ln + "\n"
+            ln = clean(ln)
+            if cur_len + len(ln) + 1 > MAX_TEXT:
+                pages.append("".join(cur).rstrip())
+                cur = [head, ln, "\n"]
+                cur_len = len(head) + len(ln) + 1
             else:
-                cur += ln + "\n"
-        if cur.strip(): pages.append(cur.rstrip())
+                cur.append(ln); cur.append("\n")
+                cur_len += len(ln) + 1
+        tail = "".join(cur)
+        if tail.strip(): pages.append(tail.rstrip())
         total = len(pages)
+        send = self._send_text
         for i, p in enumerate(pages, 1):
             prefix = f"({i}/{total}) " if total > 1 else ""
-            self._send_text(dest, prefix + p)
+            send(dest, prefix + p)
 
     # -- UI / help / status
     def _menu_text(self) -> str:
+        # BBS_NAME and MAX_TEXT never change at runtime, so the fitted menu
+        # line is built once and reused for every '?'
+        if self._menu_cache is not None:
+            return self._menu_cache
+        self._menu_cache = self._build_menu_text()
+        return self._menu_cache
+
+    def _build_menu_text(self) -> str:
         name = BBS_NAME.strip()
         if len(name) > 28:
             words = name.split()
@@ -382,15 +802,30 @@ class MiniBBS:
     def _cmd_nodes(self, frm):
         items = self._collect_nodes()
         count = len(items)
-        lines = [f"{n['sn']:<8} {n['nid']}  {n['ln']}" for n in items] if count else ["(no nodes)"]
+        shown = items[:NODES_MAX] if NODES_MAX > 0 else items
+        lines = [f"{n['sn']:<8} {n['nid']}  {n['ln']}" for n in shown] if count else ["(no nodes)"]
+        if count > len(shown):
+            lines.append(f"…and {count - len(shown)} more")
         self._send_paged(frm, lines, title=f"[{BBS_NAME}] Nodes: {count}")
 
     # -- posts
-    def _post_new(self, author, text, reply_to=None, do_sync=True):
-        c = self.db.cursor()
-        c.execute("INSERT INTO posts(ts,author,body,reply_to) VALUES(?,?,?,?)", (now(), author, text, reply_to))
-        self.db.commit()
-        pid = c.lastrowid
+    def _post_new(self, author, text, reply_to=None, do_sync=True, commit=True):
+        # commit=False lets a caller fold this insert into its own
+        # transaction (the sync END apply path)
+        with self._db_lock:
+            c = self.db.cursor()
+            if _HAS_RETURNING:
+                row = c.execute("INSERT INTO posts(ts,author,body,reply_to) VALUES(?,?,?,?) RETURNING id",
+                                (now(), author, text, reply_to)).fetchone()
+                pid = row[0]
+            else:
+                c.execute("INSERT INTO posts(ts,author,body,reply_to) VALUES(?,?,?,?)", (now(), author, text, reply_to))
+                pid = c.lastrowid
+            if commit:
+                self.db.commit()
+        self._bump("posts")
+        if pid and pid > self._counts.get("latest", 0):
+            self._counts["latest"] = pid
         if do_sync and self.sync_enabled:
             self._replicate_new_post(pid, text, author, reply_to)
         return pid
@@ -401,8 +836,8 @@ class MiniBBS:
 
     def _cmd_reply(self, frm, author, pid_str, text):
         try: pid = int(pid_str)
-        except: self._send_text(frm, "bad id"); return
-        row = self.db.execute("SELECT id FROM posts WHERE id=?", (pid,)).fetchone()
+        except ValueError: self._send_text(frm, "bad id"); return
+        row = self.db.execute(_SQL_POST_EXISTS, (pid,)).fetchone()
         if not row: self._send_text(frm, f"no such post {pid}"); return
         rid = self._post_new(author, text, pid, do_sync=True)
         self._send_text(frm, f"reply #{rid} -> #{pid}")
@@ -414,18 +849,20 @@ class MiniBBS:
                 pid = int(arg)
                 row = c.execute("SELECT id,ts,author,body,reply_to FROM posts WHERE id=?", (pid,)).fetchone()
                 if not row: self._send_text(frm, f"no such post {pid}"); return
-                ts = datetime.utcfromtimestamp(row["ts"]).strftime("%Y-%m-%d %H:%M")
+                # time.strftime on a gmtime tuple skips the datetime/tzinfo
+                # machinery; this runs per row on the receive thread
+                ts = time.strftime("%Y-%m-%d %H:%M", time.gmtime(row["ts"]))
                 lines = [f"#{row['id']} {ts} {row['author']}", _clean_name(row["body"])]
                 for rr in c.execute("SELECT id,ts,author,body FROM posts WHERE reply_to=? ORDER BY id", (pid,)):
-                    ts2 = datetime.utcfromtimestamp(rr["ts"]).strftime("%Y-%m-%d %H:%M")
+                    ts2 = time.strftime("%Y-%m-%d %H:%M", time.gmtime(rr["ts"]))
                     lines.append(f" ↳ #{rr['id']} {ts2} {rr['author']}: {_clean_name(rr['body'])}")
                 self._send_paged(frm, lines, title=None)
-            except:
+            except (ValueError, sqlite3.Error):
                 self._send_text(frm, "bad id")
         else:
             lines = []
             for r in c.execute("SELECT id,ts,author,body FROM posts ORDER BY id DESC LIMIT 10"):
-                ts = datetime.utcfromtimestamp(r["ts"]).strftime("%m-%d %H:%M")
+                ts = time.strftime("%m-%d %H:%M", time.gmtime(r["ts"]))
                 lines.append(f"#{r['id']:>4} {ts} {r['author']}: {_clean_name(r['body'])}")
             self._send_paged(frm, lines or ["(no posts yet)"], title=f"[{BBS_NAME}] Recent:")
 
@@ -433,7 +870,7 @@ class MiniBBS:
     def _cmd_info(self, frm, args, fromId):
         if args and args[0] == "set":
             if not self._is_admin(fromId):
-                self._send_text(frm, "admin only"); return
+                self._send_text(frm, MSG_ADMIN_ONLY); return
             rest = " ".join(args[1:]).strip()
             # optional "hours text" form
             exp_ts = ""
@@ -443,13 +880,14 @@ class MiniBBS:
                 exp_ts = str(now() + hours*3600)
             else:
                 body = rest
-            self.db.execute("INSERT INTO kv(k,v) VALUES('notice',?) ON CONFLICT(k) DO UPDATE SET v=excluded.v", (body,))
-            self.db.execute("INSERT INTO kv(k,v) VALUES('notice_set',?) ON CONFLICT(k) DO UPDATE SET v=excluded.v", (str(now()),))
-            if exp_ts:
-                self.db.execute("INSERT INTO kv(k,v) VALUES('notice_exp',?) ON CONFLICT(k) DO UPDATE SET v=excluded.v", (exp_ts,))
-            else:
-                self.db.execute("DELETE FROM kv WHERE k='notice_exp'")
-            self.db.commit()
+            with self._db_lock:
+                self.db.execute("INSERT INTO kv(k,v) VALUES('notice',?) ON CONFLICT(k) DO UPDATE SET v=excluded.v", (body,))
+                self.db.execute("INSERT INTO kv(k,v) VALUES('notice_set',?) ON CONFLICT(k) DO UPDATE SET v=excluded.v", (str(now()),))
+                if exp_ts:
+                    self.db.execute("INSERT INTO kv(k,v) VALUES('notice_exp',?) ON CONFLICT(k) DO UPDATE SET v=excluded.v", (exp_ts,))
+                else:
+                    self.db.execute("DELETE FROM kv WHERE k='notice_exp'")
+                self.db.commit()
             self._send_text(frm, "notice updated")
         else:
             row = self.db.execute("SELECT v FROM kv WHERE k='notice'").fetchone()
@@ -479,8 +917,9 @@ class MiniBBS:
             self._send_text(frm, "dm usage: dm <short> <text>"); return
         hit, sugg = self._match_short(short)
         if hit:
-            self.db.execute("INSERT INTO dm_out(to_id,body,created_ts,delivered_ts) VALUES(?,?,?,NULL)", (hit["nid"], msg, now()))
-            self.db.commit()
+            self._db_write("INSERT INTO dm_out(to_id,body,created_ts,delivered_ts) VALUES(?,?,?,NULL)", (hit["nid"], msg, now()))
+            self._has_pending_dm.add(hit["nid"])
+            self._bump("qdm")
             self._send_text(frm, f"queued dm to {hit['sn']} ({hit['nid']})")
             return
         if sugg:
@@ -491,318 +930,519 @@ class MiniBBS:
 
     def _deliver_queued(self, toId):
         c = self.db.cursor()
-        for row in c.execute("SELECT id,body FROM dm_out WHERE to_id=? AND delivered_ts IS NULL LIMIT 3", (toId,)):
-            self._send_text(toId, f"[DM] {row['body']}")
-            c.execute("UPDATE dm_out SET delivered_ts=? WHERE id=?", (now(), row["id"]))
-        self.db.commit()
+        rows = c.execute(_SQL_DM_PENDING, (toId,)).fetchall()
+        if not rows:
+            self._has_pending_dm.discard(toId)
+            return
+        # coalesce into one frame when everything fits; fewer radio round-trips
+        texts = [f"[DM] {r['body']}" for r in rows]
+        joined = "\n".join(texts)
+        if len(joined) <= MAX_TEXT:
+            self._send_text(toId, joined)
+        else:
+            for t in texts:
+                self._send_text(toId, t)
+        ts = now()
+        for r in rows:
+            self._db_write("UPDATE dm_out SET delivered_ts=? WHERE id=?", (ts, r["id"]))
+        self._bump("qdm", -len(rows))
+        if len(rows) < 3:
+            # fewer than the LIMIT means the outbox for this node is drained
+            self._has_pending_dm.discard(toId)
 
     # -- admin / blacklist
-    def _is_admin(self, fromId): return bool(self.db.execute("SELECT 1 FROM admins WHERE id=?", (fromId,)).fetchone())
+    @contextlib.contextmanager
+    def _write_tx(self):
+        # BEGIN IMMEDIATE takes the write lock up front so a concurrent
+        # reader can't escalate us into SQLITE_BUSY mid-transaction
+        with self._db_lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.db
+            except BaseException:
+                self.db.rollback()
+                raise
+            else:
+                self.db.commit()
+    def _is_admin(self, fromId): return fromId in self._admins
+    def _bump(self, name, delta=1):
+        self._counts[name] = self._counts.get(name, 0) + delta
     def _admin_add(self, nid):
         try:
-            self.db.execute("INSERT OR IGNORE INTO admins(id) VALUES(?)", (nid,)); self.db.commit()
-        except: pass
+            with self._write_tx() as db:
+                db.execute("INSERT OR IGNORE INTO admins(id) VALUES(?)", (nid,))
+            if nid not in self._admins:
+                self._admins.add(nid); self._bump("admins")
+        except sqlite3.Error: pass
+    def _admin_del(self, nid):
+        with self._write_tx() as db:
+            db.execute("DELETE FROM admins WHERE id=?", (nid,))
+        if nid in self._admins:
+            self._admins.discard(nid); self._bump("admins", -1)
     def _peer_add(self, nid):
         try:
-            self.db.execute("INSERT OR IGNORE INTO peers(id,last_seen) VALUES(?,?)", (nid, 0)); self.db.commit()
-        except: pass
+            with self._write_tx() as db:
+                db.execute("INSERT OR IGNORE INTO peers(id,last_seen) VALUES(?,?)", (nid, 0))
+            if nid not in self._peers:
+                self._peers.add(nid); self._bump("peers")
+        except sqlite3.Error: pass
+    def _peer_del(self, nid):
+        with self._write_tx() as db:
+            db.execute("DELETE FROM peers WHERE id=?", (nid,))
+        if nid in self._peers:
+            self._peers.discard(nid); self._bump("peers", -1)
+    def _bl_add(self, nid):
+        with self._write_tx() as db:
+            db.execute("INSERT OR IGNORE INTO blacklist(id) VALUES(?)", (nid,))
+        if nid not in self._blacklist:
+            self._blacklist.add(nid); self._bump("bl")
+    def _bl_del(self, nid):
+        with self._write_tx() as db:
+            db.execute("DELETE FROM blacklist WHERE id=?", (nid,))
+        if nid in self._blacklist:
+            self._blacklist.discard(nid); self._bump("bl", -1)
     def _peer_list(self) -> List[str]:
-        return [r["id"] for r in self.db.execute("SELECT id FROM peers ORDER BY id")]
-
+        return sorted(self._peers)
     # -- health
     def _cmd_health(self, frm, args, fromId):
         if not HEALTH_PUBLIC and not self._is_admin(fromId):
-            self._send_text(frm, "admin only"); return
+            self._send_text(frm, MSG_ADMIN_ONLY); return
+        # short TTL cache so near-simultaneous health requests share one
+        # build; the lock stops callers racing into _build_health together
+        with self._health_lock:
+            ts, cached = self._health_cache
+            if cached is None or time.monotonic() - ts >= 2.0:
+                cached = self._build_health()
+                self._health_cache = (time.monotonic(), cached)
+        line, lines = cached
+        if line is not None:
+            self._send_text(frm, line)
+        else:
+            self._send_paged(frm, lines, title=f"[{BBS_NAME}] Health:")
+
+    def _build_health(self):
         dev = self.dev_path or "n/a"
         up = fmt_uptime(now() - self.connected_at)
-        try: nodes = len(self._collect_nodes())
-        except Exception: nodes = 0
-        c = self.db.cursor()
-        posts = c.execute("SELECT COUNT(*) c FROM posts").fetchone()["c"]
-        latest = c.execute("SELECT IFNULL(MAX(id),0) m FROM posts").fetchone()["m"]
-        admins = c.execute("SELECT COUNT(*) c FROM admins").fetchone()["c"]
-        peers  = c.execute("SELECT COUNT(*) c FROM peers").fetchone()["c"]
-        bl     = c.execute("SELECT COUNT(*) c FROM blacklist").fetchone()["c"]
-        qdm    = c.execute("SELECT COUNT(*) c FROM dm_out WHERE delivered_ts IS NULL").fetchone()["c"]
+        nodes = self._count_nodes() if self.iface is not None else 0
+        # counters are maintained at the write sites; health is O(1) in DB size
+        cn = self._counts
+        posts, latest, admins, peers, bl, qdm = (
+            cn["posts"], cn["latest"], cn["admins"], cn["peers"], cn["bl"], cn["qdm"])
         inv    = self.last_inv_at
         inv_ago = f"{(now()-inv)}s ago" if inv else "n/a"
         sync   = "on" if self.sync_enabled else "off"
-        line = f"link=ok dev={dev} up={up} posts={posts} latest={latest} peers={peers} admins={admins} bl={bl} qdm={qdm} nodes={nodes} sync={sync} inv={inv_ago}"
+        vals = {"dev": dev, "up": up, "posts": posts, "latest": latest,
+                "peers": peers, "admins": admins, "bl": bl, "qdm": qdm,
+                "nodes": nodes, "sync": sync, "inv": inv_ago}
+        line = self._health_tpl.format_map(vals)
         if len(line) <= MAX_TEXT:
-            self._send_text(frm, line); return
-        lines = [f"link=ok dev={dev} up={up}",
-                 f"posts={posts} latest={latest} peers={peers}",
-                 f"admins={admins} bl={bl} qdm={qdm} nodes={nodes}",
-                 f"sync={sync} last_inv={inv_ago}"]
-        self._send_paged(frm, lines, title=f"[{BBS_NAME}] Health:")
+            return line, None
+        return None, tuple(s.format_map(vals) for s in self._health_pages_fmt)
 
     # -- sync
-    def _sync_loop(self):
-        while not self.stop_evt.wait(SYNC_PERIOD):
-            if self.sync_enabled:
-                self._broadcast_inventory()
+    def _sync_once(self):
+        # nothing posted since the last round -> no airtime, no SQL
+        if self.sync_enabled and self._counts["latest"] != self._last_inv_latest:
+            self._broadcast_inventory()
+            self._last_inv_latest = self._counts["latest"]
 
     def _broadcast_inventory(self):
-        ids = [str(r["id"]) for r in self.db.execute("SELECT id FROM posts ORDER BY id DESC LIMIT ?", (SYNC_INV_N,))]
-        if not ids: return
-        payload = f"{SYNC_TAG} INV ids=" + ",".join(ids[::-1])
+        # pull-style anti-entropy: advertise a high-watermark plus a 64-bit
+        # bloom of the recent id window instead of an explicit id list —
+        # peers only GET ids that are bloom-positive and locally missing
+        hi = self.db.execute("SELECT IFNULL(MAX(id),0) FROM posts").fetchone()[0]
+        if not hi: return
+        bits = 0
+        for r in self.db.execute("SELECT id FROM posts WHERE id > ?", (hi - _INV_WINDOW,)):
+            bits |= 1 << (r[0] & 63)
+        payload = f"{SYNC_TAG} INV hi={hi} bf={bits:016x}"
         for peer in self._peer_list():
-            self._send_text(peer, payload)
+            self._send_sync(peer, payload)
         self.last_inv_at = now()
 
     def _replicate_new_post(self, pid, body, author, reply_to):
         uid = gen_uid()
         header = f"{SYNC_TAG} POST uid={uid} id={pid} ts={now()} by={author} r={(reply_to or '-')}"
-        parts = [body[i:i+CHUNK_BYTES] for i in range(0, len(body), CHUNK_BYTES)] or [""]
+        wire, comp = _encode_sync_body(body)
+        parts = _chunk_utf8(wire)
         total = len(parts)
+        tail = f" n={total} c=1" if comp else f" n={total}"
+        # format every frame once; the peer loop only enqueues
+        frames = [header + tail]
+        frames.extend(f"{SYNC_TAG} PART uid={uid} {i}/{total} {ch}" for i, ch in enumerate(parts, 1))
+        frames.append(f"{SYNC_TAG} END uid={uid}")
         for peer in self._peer_list():
-            self._send_text(peer, header + f" n={total}")
-            for i, ch in enumerate(parts, 1):
-                self._send_text(peer, f"{SYNC_TAG} PART uid={uid} {i}/{total} {ch}")
-            self._send_text(peer, f"{SYNC_TAG} END uid={uid}")
+            for frame in frames:
+                self._send_sync(peer, frame)
 
     def _handle_sync(self, fromId, text):
-        toks = text.split()
+        if fromId not in self._peers: return
+        toks = text.split(None, 2)
         if len(toks) < 2: return
         cmd = toks[1]
-        if fromId not in self._peer_list(): return
 
-        if cmd == "INV":
-            try:
-                kv = dict(x.split("=",1) for x in toks[2:])
-                ids = [int(x) for x in kv.get("ids","").split(",") if x]
-            except Exception:
-                return
-            missing = []
-            for i in ids:
-                if not self.db.execute("SELECT 1 FROM posts WHERE id=?", (i,)).fetchone():
-                    missing.append(i)
-            for mid in missing[:3]:
-                self._send_text(fromId, f"{SYNC_TAG} GET id={mid}")
+        if cmd == "PART":
+            m = _RE_SYNC_PART.match(text)
+            if not m: return
+            uid = m.group(1); idx = int(m.group(2)); tot = int(m.group(3)); chunk = m.group(4)
+            with self._rx_buf_lock:
+                buf = self._rx_buf.get(uid)
+                if not buf: return
+                if tot != buf["total"]:
+                    buf["total"] = tot
+                    parts = buf["parts"]
+                    buf["parts"] = parts[:tot] + [None]*(tot-len(parts))
+                if 1 <= idx <= buf["total"]:
+                    buf["parts"][idx-1] = chunk
             return
 
-        if cmd == "GET":
-            try:
-                mid = int(dict(x.split("=",1) for x in toks[2:]).get("id","0"))
-            except Exception:
+        if cmd == "END":
+            m = _RE_SYNC_END.match(text)
+            if not m: return
+            uid = m.group(1)
+            with self._rx_buf_lock:
+                buf = self._rx_buf.pop(uid, None)
+            if self._bloom_maybe(uid) and self.db.execute(_SQL_UID_APPLIED, (uid,)).fetchone():
                 return
-            row = self.db.execute("SELECT id,ts,author,body,reply_to FROM posts WHERE id=?", (mid,)).fetchone()
-            if not row: return
-            uid = gen_uid()
-            header = f"{SYNC_TAG} POST uid={uid} id={row['id']} ts={row['ts']} by={row['author']} r={(row['reply_to'] or '-')}"
-            parts = [row["body"][i:i+CHUNK_BYTES] for i in range(0, len(row["body"]), CHUNK_BYTES)] or [""]
-            total = len(parts)
-            self._send_text(fromId, header + f" n={total}")
-            for i, ch in enumerate(parts, 1):
-                self._send_text(fromId, f"{SYNC_TAG} PART uid={uid} {i}/{total} {ch}")
-            self._send_text(fromId, f"{SYNC_TAG} END uid={uid}")
+            if not buf: return
+            body = _decode_sync_body("".join(p or "" for p in buf["parts"]), buf.get("c", False))
+            # one transaction for the whole apply: post row + applied marker
+            with self._db_lock, self.db:
+                self._post_new(author=f"[peer]{fromId}", text=body, reply_to=None,
+                               do_sync=False, commit=False)
+                self.db.execute("INSERT OR IGNORE INTO applied_uids(uid,ts) VALUES(?,?)", (uid, now()))
+            self._bloom_add(uid)
             return
 
         if cmd == "POST":
-            try:
-                kv = dict(x.split("=",1) for x in toks[2:])
-                uid = kv["uid"]; total = int(kv.get("n","1"))
-            except Exception:
-                return
-            self.db.execute("INSERT OR IGNORE INTO seen_uids(uid,ts) VALUES(?,?)", (uid, now()))
-            self.db.execute("INSERT OR IGNORE INTO rxparts(uid,total,got,data,from_id,created_ts) VALUES(?,?,?,?,?,?)",
-                            (uid, total, 0, "", fromId, now()))
-            self.db.commit()
+            m = _RE_SYNC_POST.match(text)
+            if not m: return
+            uid = m.group(1); total = max(1, int(m.group(3)))
+            comp = m.group(4) == "1"
+            # reassemble in memory; nothing touches the DB until END arrives
+            with self._rx_buf_lock:
+                self._rx_buf[uid] = {"total": total, "parts": [None]*total, "from": fromId, "ts": now(), "c": comp}
+            with self._db_lock:
+                self.db.execute("INSERT OR IGNORE INTO seen_uids(uid,ts) VALUES(?,?)", (uid, now()))
+                self.db.commit()
             return
 
-        if cmd == "PART":
-            try:
-                uid = toks[2].split("=",1)[1]
-                idx, tot = toks[3].split("/",1)
-                idx = int(idx); tot = int(tot)
-                chunk = text.split(toks[3],1)[1].strip()
-            except Exception:
-                return
-            row = self.db.execute("SELECT uid,total,got,data FROM rxparts WHERE uid=?", (uid,)).fetchone()
-            if not row: return
-            total = tot
-            newdata = (row["data"] or "") + chunk
-            got = row["got"] + 1
-            self.db.execute("UPDATE rxparts SET data=?, got=?, total=? WHERE uid=?", (newdata, got, total, uid))
-            self.db.commit()
+        if cmd == "INV":
+            m = _RE_SYNC_INV.match(text)
+            if not m: return
+            ids_s, hi_s, bf_s = m.group(1), m.group(2), m.group(3)
+            if hi_s and bf_s:
+                hi = int(hi_s); bits = int(bf_s, 16)
+                lo = max(1, hi - _INV_WINDOW + 1)
+                have = {r[0] for r in self.db.execute("SELECT id FROM posts WHERE id BETWEEN ? AND ?", (lo, hi))}
+                missing = [i for i in range(lo, hi + 1) if i not in have and (bits >> (i & 63)) & 1]
+            else:
+                # legacy explicit-id inventory from older peers
+                ids = [int(x) for x in (ids_s or "").split(",") if x][:64]
+                if ids:
+                    have = {r[0] for r in self.db.execute(
+                        f"SELECT id FROM posts WHERE id IN ({','.join('?' * len(ids))})", ids)}
+                else:
+                    have = set()
+                missing = [i for i in ids if i not in have]
+            for mid in missing[:3]:
+                self._send_sync(fromId, f"{SYNC_TAG} GET id={mid}")
             return
 
-        if cmd == "END":
-            try:
-                uid = toks[2].split("=",1)[1]
-            except Exception:
-                return
-            if self.db.execute("SELECT 1 FROM applied_uids WHERE uid=?", (uid,)).fetchone():
-                self.db.execute("DELETE FROM rxparts WHERE uid=?", (uid,))
-                self.db.commit()
-                return
-            row = self.db.execute("SELECT data FROM rxparts WHERE uid=?", (uid,)).fetchone()
+        if cmd == "GET":
+            m = _RE_SYNC_GET.match(text)
+            if not m: return
+            mid = int(m.group(1))
+            row = self.db.execute(_SQL_POST_FETCH, (mid,)).fetchone()
             if not row: return
-            body = row["data"] or ""
-            self._post_new(author=f"[peer]{fromId}", text=body, reply_to=None, do_sync=False)
-            self.db.execute("INSERT OR IGNORE INTO applied_uids(uid,ts) VALUES(?,?)", (uid, now()))
-            self.db.execute("DELETE FROM rxparts WHERE uid=?", (uid,))
-            self.db.commit()
+            uid = gen_uid()
+            header = f"{SYNC_TAG} POST uid={uid} id={row['id']} ts={row['ts']} by={row['author']} r={(row['reply_to'] or '-')}"
+            wire, comp = _encode_sync_body(row["body"])
+            parts = _chunk_utf8(wire)
+            total = len(parts)
+            tail = f" n={total} c=1" if comp else f" n={total}"
+            self._send_sync(fromId, header + tail)
+            for i, ch in enumerate(parts, 1):
+                self._send_sync(fromId, f"{SYNC_TAG} PART uid={uid} {i}/{total} {ch}")
+            self._send_sync(fromId, f"{SYNC_TAG} END uid={uid}")
             return
 
     # -- text extraction
-    def _extract_text(self, packet) -> Optional[str]:
-        d = packet.get("decoded", {}) or {}
-        txt = d.get("text")
+    def _extract_text(self, d) -> Optional[str]:
+        get = d.get
+        txt = get("text")
         if isinstance(txt, bytes):
-            try: return txt.decode("utf-8","ignore")
-            except: pass
+            return txt.decode("utf-8", "ignore")
         if isinstance(txt, str): return txt
-        pay = d.get("payload")
+        pay = get("payload")
         if isinstance(pay, bytes):
-            try: return pay.decode("utf-8","ignore")
-            except: return None
+            return pay.decode("utf-8", "ignore")
         if isinstance(pay, str): return pay
         return None
 
+    # -- command wrappers: uniform (fromId, tok, low) signature so the
+    # dispatch table below can resolve any command with one dict lookup.
+    # Return True when the command was consumed, False to fall through to
+    # the unknown-command reply (mirrors the old ladder's guard misses).
+    def _h_read(self, fromId, tok, low):
+        self._cmd_read(fromId, tok[1] if len(tok) > 1 else None); return True
+    def _h_post(self, fromId, tok, low):
+        if len(tok) >= 2:
+            self._cmd_post(fromId, fromId, low[len(tok[0]):].strip())
+        else:
+            self._send_text(fromId, "usage: p <text>")
+        return True
+    def _h_reply(self, fromId, tok, low):
+        if len(tok) < 3: return False
+        self._cmd_reply(fromId, fromId, tok[1], tok[2]); return True
+    def _h_info(self, fromId, tok, low):
+        self._cmd_info(fromId, tok[1:], fromId); return True
+    def _h_status(self, fromId, tok, low):
+        self._cmd_status(fromId); return True
+    def _h_whoami(self, fromId, tok, low):
+        self._cmd_whoami(fromId, fromId); return True
+    def _h_whois(self, fromId, tok, low):
+        if len(tok) < 2: return False
+        self._cmd_whois(fromId, tok[1]); return True
+    def _h_nodes(self, fromId, tok, low):
+        self._cmd_nodes(fromId); return True
+    def _h_dm(self, fromId, tok, low):
+        if len(tok) < 3: return False
+        self._cmd_dm(fromId, tok[1], tok[2]); return True
+    def _h_health(self, fromId, tok, low):
+        if HEALTH_PUBLIC or self._is_admin(fromId):
+            self._cmd_health(fromId, tok[1:], fromId)
+        else:
+            self._send_text(fromId, MSG_ADMIN_ONLY)
+        return True
+    def _h_admins(self, fromId, tok, low):
+        if len(tok) < 2 or not self._is_admin(fromId): return False
+        act = tok[1]
+        if act == "add" and len(tok) >= 3:
+            self._admin_add(tok[2].split(None, 1)[0]); self._send_text(fromId, "admin added"); return True
+        if act == "del" and len(tok) >= 3:
+            self._admin_del(tok[2].split(None, 1)[0]); self._send_text(fromId, "admin removed"); return True
+        if act == "list":
+            lines = [r["id"] for r in self.db.execute(_SQL_ADMIN_LIST)]
+            self._send_paged(fromId, lines or ["(none)"], title="[admins]"); return True
+        return False
+    def _h_bl(self, fromId, tok, low):
+        if len(tok) < 2 or not self._is_admin(fromId): return False
+        act = tok[1]
+        if act == "add" and len(tok) >= 3:
+            self._bl_add(tok[2].split(None, 1)[0]); self._send_text(fromId, "blacklisted"); return True
+        if act == "del" and len(tok) >= 3:
+            self._bl_del(tok[2].split(None, 1)[0]); self._send_text(fromId, "removed"); return True
+        if act == "list":
+            lines = [r["id"] for r in self.db.execute(_SQL_BL_LIST)]
+            self._send_paged(fromId, lines or ["(none)"], title="[blacklist]"); return True
+        return False
+    def _h_peer(self, fromId, tok, low):
+        if len(tok) < 2 or not self._is_admin(fromId): return False
+        act = tok[1]
+        if act == "add" and len(tok) >= 3:
+            self._peer_add(tok[2].split(None, 1)[0]); self._send_text(fromId, "peer added"); return True
+        if act == "del" and len(tok) >= 3:
+            self._peer_del(tok[2].split(None, 1)[0]); self._send_text(fromId, "peer removed"); return True
+        if act == "list":
+            self._send_paged(fromId, self._peer_list() or ["(none)"], title="[peers]"); return True
+        return False
+    def _h_sync_cmd(self, fromId, tok, low):
+        if len(tok) < 2 or not self._is_admin(fromId): return False
+        act = tok[1]
+        if act == "now":
+            self._broadcast_inventory(); self._send_text(fromId, "sync announced"); return True
+        if act == "on":
+            self.sync_enabled = True; self._send_text(fromId, "sync on"); return True
+        if act == "off":
+            self.sync_enabled = False; self._send_text(fromId, "sync off"); return True
+        return False
+
     # -- main receive
     def _on_receive(self, packet, interface):
         try:
+            # pull the decoded dict apart exactly once, then dispatch on the
+            # port — everything below works off these locals
             fromId = packet.get("fromId")
             if not fromId:
                 src = packet.get("from")
                 if isinstance(src, int):
                     fromId = f"!{src & 0xffffffff:08x}"
-            txt = self._extract_text(packet)
+            # bind the repeatedly-read globals to locals: LOAD_FAST beats
+            # a dict probe per access in this per-packet callback
+            monotonic = time.monotonic
+            rate = RATE_SEC
+            t = monotonic()
+            d = packet.get("decoded") or _EMPTY
+            pn = d.get("portnum")
+            if pn == "PRIVATE_APP":
+                # peer sync traffic: skip the command parser and the user
+                # rate limiter entirely
+                self.last_rx_at = t
+                pay = d.get("payload")
+                if isinstance(pay, bytes):
+                    pay = pay.decode("utf-8", "ignore")
+                if fromId and isinstance(pay, str) and pay.startswith(SYNC_TAG):
+                    self._handle_sync(fromId, pay.strip())
+                return
+
+            txt = self._extract_text(d)
 
             # filter out non-text frames for unknown replies
             if txt is None:
-                self.last_rx_at = time.time()
+                self.last_rx_at = t
                 # but still deliver queued DMs if the node popped up
-                if fromId: self._deliver_queued(fromId)
+                if fromId and fromId in self._has_pending_dm:
+                    self._dm_notify.add(fromId)
                 return
 
-            self.last_rx_at = time.time()
+            self.last_rx_at = t
             low = txt.strip()
-            dlog(f"[recv] {fromId} ch=0: {low}")
-
-            # deliver queued DMs when we see the node
-            self._deliver_queued(fromId)
+            if DEBUG_LOG: dlog(f"[recv] {fromId} ch=0: {low}")
 
             # sync
             if low.startswith(SYNC_TAG):
                 self._handle_sync(fromId, low); return
 
-            # blacklist
-            if self.db.execute("SELECT 1 FROM blacklist WHERE id=?", (fromId,)).fetchone():
-                dlog(f"[drop] blacklisted {fromId}")
+            # blacklist — checked before any other per-sender work
+            if fromId in self._blacklist:
+                if DEBUG_LOG: dlog(f"[drop] blacklisted {fromId}")
                 return
 
+            # flag the node for DM delivery; the dm thread does the sends so
+            # a chatty neighbour can't stall this callback for seconds
+            if fromId in self._has_pending_dm:
+                self._dm_notify.add(fromId)
+
             # fuzzy help/menu triggers
             low_l = low.lower()
-            if low in ("?","??") or low_l in ("help","menu","m","h"):
-                (self._cmd_menu if low in ("?","menu","m") else self._cmd_help)(fromId)
+            if low in _MENU_HELP_MARKS or low_l in _MENU_HELP_WORDS:
+                if low in _MENU_TOKENS:
+                    self._cmd_menu(fromId)
+                else:
+                    self._cmd_help(fromId)
                 return
 
             # rate limit
-            tprev = self.last_seen.get(fromId, 0.0)
-            if time.time() - tprev < RATE_SEC:
-                dlog(f"[rate] {fromId} suppressed ({time.time()-tprev:.2f}s < {RATE_SEC}s)")
+            # one monotonic read per packet; immune to NTP wall-clock jumps
+            tn = monotonic()
+            dt = tn - self.last_seen.get(fromId, -rate)
+            if dt < rate:
+                if DEBUG_LOG: dlog(f"[rate] {fromId} suppressed ({dt:.2f}s < {rate}s)")
                 return
-            self.last_seen[fromId] = time.time()
-
-            tok = low.split()
+            self.last_seen[fromId] = tn
+            self.last_seen.move_to_end(fromId)
+            # bounded LRU: a busy regional mesh would otherwise grow this
+            # dict one entry per node id forever
+            while len(self.last_seen) > 512:
+                self.last_seen.popitem(last=False)
+
+            # one split per message; maxsplit keeps the free-text third
+            # field intact so reply bodies need no second split
+            tok = low.split(maxsplit=2)
             if not tok: return
             cmd = tok[0].lower()
 
-            # user commands
-            if cmd == "r":
-                self._cmd_read(fromId, tok[1] if len(tok) > 1 else None); return
-            if cmd in ("p","post"):
-                if len(tok) >= 2:
-                    self._cmd_post(fromId, fromId, low[len(tok[0]):].strip())
-                else:
-                    self._send_text(fromId, "usage: p <text>")
-                return
-            if cmd == "reply" and len(tok) >= 3:
-                self._cmd_reply(fromId, fromId, tok[1], low.split(None,2)[2]); return
-            if cmd == "info":
-                self._cmd_info(fromId, tok[1:], fromId); return
-            if cmd == "status": self._cmd_status(fromId); return
-            if cmd == "whoami": self._cmd_whoami(fromId, fromId); return
-            if cmd == "whois" and len(tok)>=2: self._cmd_whois(fromId, tok[1]); return
-            if cmd in ("nodes","node"): self._cmd_nodes(fromId); return
-            if cmd == "dm" and len(tok)>=3: self._cmd_dm(fromId, tok[1], *tok[2:]); return
-            if cmd == "health":
-                if HEALTH_PUBLIC or self._is_admin(fromId):
-                    self._cmd_health(fromId, tok[1:], fromId)
-                else:
-                    self._send_text(fromId, "admin only")
+            # O(1) dispatch instead of the old compare ladder
+            handler = self._dispatch.get(cmd)
+            if handler is not None and handler(fromId, tok, low):
                 return
 
-            # admin
-            if cmd == "admins" and len(tok)>=2 and self._is_admin(fromId):
-                act = tok[1]
-                if act == "add" and len(tok)>=3: self._admin_add(tok[2]); self._send_text(fromId, "admin added"); return
-                if act == "del" and len(tok)>=3: self.db.execute("DELETE FROM admins WHERE id=?", (tok[2],)); self.db.commit(); self._send_text(fromId, "admin removed"); return
-                if act == "list":
-                    lines = [r["id"] for r in self.db.execute("SELECT id FROM admins ORDER BY id")]
-                    self._send_paged(fromId, lines or ["(none)"], title="[admins]"); return
-
-            if cmd == "bl" and len(tok)>=2 and self._is_admin(fromId):
-                act = tok[1]
-                if act == "add" and len(tok)>=3: self.db.execute("INSERT OR IGNORE INTO blacklist(id) VALUES(?)",(tok[2],)); self.db.commit(); self._send_text(fromId,"blacklisted"); return
-                if act == "del" and len(tok)>=3: self.db.execute("DELETE FROM blacklist WHERE id=?", (tok[2],)); self.db.commit(); self._send_text(fromId,"removed"); return
-                if act == "list":
-                    lines = [r["id"] for r in self.db.execute("SELECT id FROM blacklist ORDER BY id")]
-                    self._send_paged(fromId, lines or ["(none)"], title="[blacklist]"); return
-
-            if self._is_admin(fromId):
-                if cmd == "peer" and len(tok)>=2:
-                    act = tok[1]
-                    if act == "add" and len(tok)>=3: self._peer_add(tok[2]); self._send_text(fromId,"peer added"); return
-                    if act == "del" and len(tok)>=3: self.db.execute("DELETE FROM peers WHERE id=?", (tok[2],)); self.db.commit(); self._send_text(fromId,"peer removed"); return
-                    if act == "list": self._send_paged(fromId, self._peer_list() or ["(none)"], title="[peers]"); return
-                if cmd == "sync" and len(tok)>=2:
-                    act = tok[1]
-                    if act == "now": self._broadcast_inventory(); self._send_text(fromId,"sync announced"); return
-                    if act == "on": self.sync_enabled = True; self._send_text(fromId, "sync on"); return
-                    if act == "off": self.sync_enabled = False; self._send_text(fromId, "sync off"); return
-
             if UNKNOWN_REPLY:
-                self._send_text(fromId, "I didn't recognise that. Send '?' for menu.")
+                self._send_text(fromId, MSG_UNKNOWN)
         except Exception as e:
             print(f"[meshmini] onReceive error: {e}", flush=True)
 
     # -- watchdog
-    def _watch_loop(self):
-        while not self.stop_evt.wait(WATCH_TICK):
-            try:
-                stale = (time.time() - self.last_rx_at) > RX_STALE_SEC if self.last_rx_at else False
-                if stale:
-                    dlog(f"[meshmini] RX stale > {RX_STALE_SEC}s; triggering reconnect")
-                    self._reconnect()
-            except Exception as e:
-                print(f"[meshmini] watchdog error: {e}")
-
-    def _sync_thread_start(self):
-        if self.sync_thread is None:
-            self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
-            self.sync_thread.start()
-    def _watch_thread_start(self):
-        if self.watch_thread is None:
-            self.watch_thread = threading.Thread(target=self._watch_loop, daemon=True)
-            self.watch_thread.start()
+    def _watch_once(self):
+        # snapshot once: last_rx_at is written by the receive thread and a
+        # torn double-read could compute a bogus dt
+        t = self.last_rx_at
+        stale = bool(t) and (time.monotonic() - t) > RX_STALE_SEC
+        if stale:
+            dlog(f"[meshmini] RX stale > {RX_STALE_SEC}s; triggering reconnect")
+            self._reconnect()
+
+    # -- DM delivery: drain off the receive thread, one node per tick
+    def _dm_once(self):
+        try:
+            toId = self._dm_notify.pop()
+        except KeyError:
+            return
+        self._deliver_queued(toId)
+
+    # -- GC: keep the sync bookkeeping tables and rx buffers bounded
+    def _gc_once(self):
+        t = now()
+        self._db_write("DELETE FROM seen_uids WHERE ts < ?", (t - UID_KEEP_SEC,))
+        self._db_write("DELETE FROM applied_uids WHERE ts < ?", (t - UID_KEEP_SEC,))
+        self._db_write("DELETE FROM rxparts WHERE created_ts < ?", (t - RXPART_KEEP_SEC,))
+        # evict reassembly buffers from aborted transfers
+        with self._rx_buf_lock:
+            for uid in [u for u, b in self._rx_buf.items() if t - b["ts"] > RXPART_KEEP_SEC]:
+                self._rx_buf.pop(uid, None)
+        self._db_write("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # -- periodic scheduler: one thread services every timed job instead of
+    # a daemon thread (stack + wakeups) per loop
+    def _tick_loop(self):
+        t = time.monotonic()
+        sched = [[t + 1.0,         1.0,         self._dm_once],
+                 [t + WATCH_TICK,  WATCH_TICK,  self._watch_once],
+                 [t + SYNC_PERIOD, SYNC_PERIOD, self._sync_once],
+                 [t + GC_TICK,     GC_TICK,     self._gc_once]]
+        while True:
+            nxt = min(job[0] for job in sched)
+            if self.stop_evt.wait(max(0.0, nxt - time.monotonic())):
+                return
+            tn = time.monotonic()
+            for job in sched:
+                if job[0] <= tn:
+                    try:
+                        job[2]()
+                    except Exception as e:
+                        print(f"[meshmini] tick error ({job[2].__name__}): {e}")
+                    job[0] = tn + job[1]
+    # start() runs exactly once (from main), so the worker threads are
+    # constructed unconditionally — no is-None guards to read past
+    def _tx_thread_start(self):
+        self.tx_thread = threading.Thread(target=self._tx_loop, daemon=True)
+        self.tx_thread.start()
+    def _writer_thread_start(self):
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
+    def _tick_thread_start(self):
+        self.tick_thread = threading.Thread(target=self._tick_loop, daemon=True)
+        self.tick_thread.start()
 
     def start(self):
+        # systemd stop sends SIGTERM; turn it into a clean stop_evt shutdown
+        # instead of dying mid-commit
+        try:
+            signal.signal(signal.SIGTERM, lambda *_: self.stop_evt.set())
+        except (ValueError, OSError):
+            pass  # not on the main thread, or unsupported platform
         self._connect()
-        self._sync_thread_start()
-        self._watch_thread_start()
+        self._writer_thread_start()
+        self._tx_thread_start()
+        self._tick_thread_start()
         try:
-            while True:
-                time.sleep(1.0)
+            # block until shutdown — no 1 Hz wakeups; Ctrl-C still lands
+            # because signals interrupt Event.wait
+            self.stop_evt.wait()
         except KeyboardInterrupt:
             pass
         finally:
             self.stop_evt.set()
+            # wake the writer out of its blocking get and wait for it to
+            # drain the queue — a daemon thread is frozen at interpreter
+            # exit, so without the join the shutdown flush never runs
+            self._write_q.put(None)
+            if self.writer_thread is not None:
+                self.writer_thread.join(timeout=5)
             if self.iface:
                 try: self.iface.close()
-                except: pass
+                except Exception: pass
 
 def main():
     MiniBBS(DEVICE_PATH).start()